@@ -10,16 +10,24 @@ and a populated DuckDB database (run `python main.py --setup` first).
 Usage:
     python eval.py
     python eval.py --model llama3.3
+    python eval.py --workers 1              # Run cases sequentially
 """
 
 import argparse
+import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from src.graph import build_graph
 from src.config import MAX_ITERATIONS
 
 
+# Run config shared by every graph invocation. Treat as read-only — it is
+# passed by reference to each run.
+_GRAPH_CONFIG = {"recursion_limit": MAX_ITERATIONS * 10}
+
+
 # ── Evaluation cases ────────────────────────────────────────────
 # Each case: (question, list of player names that MUST appear in the answer)
 
@@ -47,67 +55,107 @@ EVAL_CASES = [
 ]
 
 
-def run_eval(model_name: str | None = None):
+# Expected names lowercased once, at import, rather than on every check.
+_LOWERED_NAMES = {name: name.lower() for _, names in EVAL_CASES for name in names}
+
+# One pattern over every expected name (longest first), so each answer is
+# scanned once. Matches are zero-width lookaheads, so names that overlap in
+# the text ("Hassan Whiteside" / "Whiteside") are all reported.
+_EXPECTED_NAMES_RE = re.compile(
+    "(?=("
+    + "|".join(
+        re.escape(name)
+        for name in sorted(set(_LOWERED_NAMES.values()), key=len, reverse=True)
+    )
+    + "))"
+)
+
+
+def _find_names(answer: str, expected_names: list[str]) -> list[str]:
+    """Return the expected names that appear in the answer (case-insensitive)."""
+    # At each position the regex reports the longest name starting there, so
+    # a shorter name sharing that prefix is found inside the longer hit.
+    hits = {m.group(1) for m in _EXPECTED_NAMES_RE.finditer(answer.lower())}
+    return [
+        name
+        for name in expected_names
+        if any(_LOWERED_NAMES[name] in hit for hit in hits)
+    ]
+
+
+def _run_case(graph, question: str) -> tuple[str, float]:
+    """Invoke the graph for one question, returning (answer, elapsed seconds)."""
+    start = time.time()
+    try:
+        result = graph.invoke(
+            {"messages": [("user", question)]},
+            config=_GRAPH_CONFIG,
+        )
+        answer = result["messages"][-1].content
+    except Exception as e:
+        answer = f"[ERROR] {e}"
+    return answer, time.time() - start
+
+
+def run_eval(model_name: str | None = None, max_workers: int | None = None):
+    # Questions are embedded lazily, only if a case reaches semantic search:
+    # the ranking questions here are answered from stat leaders alone.
     graph = build_graph(model_name=model_name)
 
     passed = 0
     failed = 0
-    results = []
-
-    for question, expected_names in EVAL_CASES:
-        print(f"\n{'─' * 60}")
-        print(f"Q: {question}")
-        print(f"   Expected: {expected_names}")
-
-        start = time.time()
-        try:
-            result = graph.invoke(
-                {"messages": [("user", question)]},
-                config={"recursion_limit": MAX_ITERATIONS * 10},
-            )
-            answer = result["messages"][-1].content
-            elapsed = time.time() - start
-        except Exception as e:
-            answer = f"[ERROR] {e}"
-            elapsed = time.time() - start
-
-        # Check: how many expected names appear in the answer?
-        found = [name for name in expected_names if name.lower() in answer.lower()]
-        missing = [
-            name for name in expected_names if name.lower() not in answer.lower()
-        ]
-        hit_rate = len(found) / len(expected_names)
-
-        # Pass if at least half the expected names appear
-        is_pass = hit_rate >= 0.5
-        status = "PASS" if is_pass else "FAIL"
-
-        if is_pass:
-            passed += 1
-        else:
-            failed += 1
-
-        results.append(
-            {
+    results = {}
+
+    # Each case is dominated by HTTP round-trips to Ollama, so run them
+    # concurrently. Results are reported from this thread only, in
+    # completion order, so output from different cases never interleaves.
+    with ThreadPoolExecutor(max_workers=max_workers or len(EVAL_CASES)) as ex:
+        futures = {
+            ex.submit(_run_case, graph, question): (question, expected_names)
+            for question, expected_names in EVAL_CASES
+        }
+
+        for future in as_completed(futures):
+            question, expected_names = futures[future]
+            answer, elapsed = future.result()
+
+            # Check: how many expected names appear in the answer?
+            found = _find_names(answer, expected_names)
+            missing = [name for name in expected_names if name not in found]
+            hit_rate = len(found) / len(expected_names)
+
+            # Pass if at least half the expected names appear
+            is_pass = hit_rate >= 0.5
+            status = "PASS" if is_pass else "FAIL"
+
+            if is_pass:
+                passed += 1
+            else:
+                failed += 1
+
+            results[question] = {
                 "question": question,
                 "status": status,
                 "hit_rate": hit_rate,
                 "found": found,
                 "missing": missing,
             }
-        )
 
-        print(f"   Answer: {answer[:200]}...")
-        print(f"   Found: {found}")
-        print(f"   Missing: {missing}")
-        print(f"   Result: {status} ({hit_rate:.0%} hit rate, {elapsed:.1f}s)")
+            print(f"\n{'─' * 60}")
+            print(f"Q: {question}")
+            print(f"   Expected: {expected_names}")
+            print(f"   Answer: {answer[:200]}...")
+            print(f"   Found: {found}")
+            print(f"   Missing: {missing}")
+            print(f"   Result: {status} ({hit_rate:.0%} hit rate, {elapsed:.1f}s)")
 
     # ── Summary ─────────────────────────────────────────────────
     total = passed + failed
     print(f"\n{'=' * 60}")
     print(f"EVALUATION SUMMARY: {passed}/{total} passed ({passed / total:.0%})")
     print(f"{'=' * 60}")
-    for r in results:
+    for question, _ in EVAL_CASES:
+        r = results[question]
         print(f"  [{r['status']}] {r['question']}")
         if r["missing"]:
             print(f"        missing: {r['missing']}")
@@ -118,7 +166,12 @@ def run_eval(model_name: str | None = None):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Evaluate NBA Analytics Copilot")
     parser.add_argument("--model", type=str, help="Ollama model name")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of cases to run concurrently (default: all at once)",
+    )
     args = parser.parse_args()
 
-    success = run_eval(model_name=args.model)
+    success = run_eval(model_name=args.model, max_workers=args.workers)
     sys.exit(0 if success else 1)
@@ -19,9 +19,16 @@ from src.pipeline import (
     build_embeddings,
 )
 from src.graph import build_graph
+from src.graph.cache import clear_graph_caches
+from src.agent.tools import clear_tool_caches
 from src.config import MAX_ITERATIONS
 
 
+# Run config shared by every graph invocation. Treat as read-only — it is
+# passed by reference to each run.
+_GRAPH_CONFIG = {"recursion_limit": MAX_ITERATIONS * 10}
+
+
 def run_pipeline():
     """Run the full ETL pipeline to prepare data."""
     print("Running ETL pipeline...")
@@ -30,10 +37,49 @@ def run_pipeline():
     build_player_season_features()
     generate_player_summaries()
     build_embeddings()
+    clear_tool_caches()
+    clear_graph_caches()
     print("-" * 40)
     print("Pipeline complete! You can now ask questions.\n")
 
 
+def stream_answer(graph, question: str) -> dict:
+    """Run the graph, printing the synthesizer's answer as tokens arrive.
+
+    Returns the final graph state (same as graph.invoke would).
+    """
+    final_state = {}
+    streamed_step = None
+
+    for mode, chunk in graph.stream(
+        {"messages": [("user", question)]},
+        config=_GRAPH_CONFIG,
+        stream_mode=["messages", "values"],
+    ):
+        if mode == "values":
+            final_state = chunk
+            continue
+
+        message, metadata = chunk
+        if metadata.get("langgraph_node") != "synthesizer" or not message.content:
+            continue
+
+        # A feedback-loop retry runs the synthesizer again — separate its output
+        step = metadata.get("langgraph_step")
+        if streamed_step is None:
+            print()
+        elif step != streamed_step:
+            print("\n")
+        streamed_step = step
+        print(message.content, end="", flush=True)
+
+    if streamed_step is None:
+        print("\n" + final_state["messages"][-1].content)
+    else:
+        print()
+    return final_state
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="NBA Analytics Copilot - Ask questions about NBA statistics",
@@ -86,12 +132,9 @@ def main():
         print("\nError: Please provide a question or use --setup")
         sys.exit(1)
 
-    # Build and invoke the multi-agent graph
+    # Build the multi-agent graph and stream the answer as it is generated
     graph = build_graph(model_name=args.model)
-    result = graph.invoke(
-        {"messages": [("user", args.question)]},
-        config={"recursion_limit": MAX_ITERATIONS * 10},
-    )
+    result = stream_answer(graph, args.question)
 
     # Verbose: show the multi-agent trace
     if args.verbose:
@@ -111,10 +154,7 @@ def main():
         if rag:
             preview = rag[:300] + "..." if len(rag) > 300 else rag
             print(f"\n[RAG Agent]\n{preview}")
-        print(f"{'=' * 60}\n")
-
-    answer = result["messages"][-1].content
-    print("\n" + answer)
+        print(f"{'=' * 60}")
 
 
 if __name__ == "__main__":
@@ -5,25 +5,54 @@ Two tools with clear separation of concerns:
 - execute_sql: dynamic SQL execution (structured data queries)
 """
 
+import math
 import re
+import time
+from collections.abc import Hashable, Mapping, Sequence
+from decimal import Decimal
+from functools import lru_cache
+from threading import Lock
+from types import MappingProxyType
+from typing import TYPE_CHECKING
 
-from src.db import get_connection
-from src.retrieval.semantic import SemanticRetriever
-from src.config import SIMILARITY_THRESHOLD, MIN_GAMES
+import numpy as np
+
+from src.db import get_cursor
+from src.config import (
+    SIMILARITY_THRESHOLD,
+    MIN_GAMES,
+    SEARCH_CACHE_MIN_SIMILARITY,
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_TTL,
+)
+
+if TYPE_CHECKING:
+    from src.retrieval.semantic import SemanticRetriever
 
 
 # Initialize retriever once (singleton pattern for efficiency)
 _retriever = None
 
 
-def get_retriever() -> SemanticRetriever:
-    """Get or create the semantic retriever singleton."""
+def get_retriever() -> "SemanticRetriever":
+    """Get or create the semantic retriever singleton.
+
+    The import is deferred to here: it pulls in sentence-transformers and
+    torch, which SQL-only callers (and the test suite) never need.
+    """
     global _retriever
     if _retriever is None:
+        from src.retrieval.semantic import SemanticRetriever
+
         _retriever = SemanticRetriever()
     return _retriever
 
 
+def warm_retriever() -> None:
+    """Build the retriever singleton and warm it before the first search."""
+    get_retriever().warm_up()
+
+
 def _avg_similarity(results: list[dict]) -> float:
     """Average similarity score across retrieval results."""
     if not results:
@@ -31,7 +60,7 @@ def _avg_similarity(results: list[dict]) -> float:
     return sum(r["similarity"] for r in results) / len(results)
 
 
-def _format_results(results: list[dict]) -> str:
+def _format_results(results: list[Mapping]) -> str:
     """Format retrieval results into a readable string."""
     output = []
     for i, r in enumerate(results, 1):
@@ -69,16 +98,34 @@ STAT_KEYWORDS: list[tuple[str, str]] = [
 ]
 
 
+# Every column a keyword can map to (the only columns _fetch_stat_leaders
+# will interpolate into SQL).
+STAT_COLUMNS = frozenset(column for _, column in STAT_KEYWORDS)
+
+# One alternation over every keyword, each in its own named group (k0, k1,
+# ...) so a single scan reports all keywords present. Matches are zero-width
+# lookaheads, so overlapping keywords ("three-p" / "point") are all seen.
+_STAT_KEYWORD_RE = re.compile(
+    "(?=(?:"
+    + "|".join(
+        f"(?P<k{i}>{re.escape(keyword)})"
+        for i, (keyword, _) in enumerate(STAT_KEYWORDS)
+    )
+    + "))"
+)
+
+
+@lru_cache(maxsize=128)
 def _match_stat_column(query: str) -> str | None:
     """Return the stat column matching keywords in the query, or None."""
-    query_lower = query.lower()
-    for keyword, column in STAT_KEYWORDS:
-        if keyword in query_lower:
-            return column
-    return None
+    hits = [int(m.lastgroup[1:]) for m in _STAT_KEYWORD_RE.finditer(query.lower())]
+    if not hits:
+        return None
+    # Priority follows STAT_KEYWORDS order, not position in the query
+    return STAT_KEYWORDS[min(hits)][1]
 
 
-def _get_stat_leaders(query: str, top_k: int = 5) -> list[dict]:
+def _get_stat_leaders(query: str, top_k: int = 5) -> list[Mapping]:
     """Fetch top players by the stat column matching the query keywords.
 
     Returns results in the same format as SemanticRetriever.retrieve_with_stats
@@ -87,50 +134,170 @@ def _get_stat_leaders(query: str, top_k: int = 5) -> list[dict]:
     column = _match_stat_column(query)
     if not column:
         return []
+    return list(_fetch_stat_leaders(column, top_k))
+
+
+# Stats returned alongside each stat leader (same keys as retrieve_with_stats)
+_LEADER_STATS = (
+    "pts_per_game",
+    "reb_per_game",
+    "ast_per_game",
+    "tov_per_game",
+    "stl_per_game",
+    "blk_per_game",
+    "true_shooting_pct",
+    "ast_to_tov_ratio",
+    "stocks_per_game",
+)
+
+# One query text per rankable column, built once. Column names can't be bound
+# as parameters, so only these known columns are ever interpolated; the
+# remaining values are bound per call.
+_STAT_LEADERS_SQL = {
+    column: f"""
+        SELECT f.player_name, s.summary, {", ".join(f"f.{c}" for c in _LEADER_STATS)}
+        FROM player_season_features f
+        JOIN player_summaries s USING (player_name)
+        WHERE f.games_played >= ?
+        ORDER BY f.{column} DESC
+        LIMIT ?
+    """
+    for column in STAT_COLUMNS
+}
+
+
+@lru_cache(maxsize=32)
+def _fetch_stat_leaders(column: str, top_k: int) -> tuple[Mapping, ...]:
+    """Query the top_k players by column (cached — the tables only change on ETL).
+
+    Rows and their stats are read-only mappings inside a tuple, so callers
+    can't mutate the cached value.
+    """
+    sql = _STAT_LEADERS_SQL.get(column)
+    if sql is None:
+        raise ValueError(f"Unknown stat column: {column}")
 
-    con = get_connection()
+    con = get_cursor()
     try:
-        rows = con.execute(f"""
-            SELECT
-                f.player_name,
-                s.summary,
-                f.pts_per_game,
-                f.reb_per_game,
-                f.ast_per_game,
-                f.to_per_game,
-                f.stl_per_game,
-                f.blk_per_game,
-                f.true_shooting_pct,
-                f.ast_to_tov_ratio,
-                f.stocks_per_game
-            FROM player_season_features f
-            JOIN player_summaries s USING (player_name)
-            WHERE f.games_played >= {MIN_GAMES}
-            ORDER BY f.{column} DESC
-            LIMIT {top_k}
-        """).fetchall()
+        rows = con.execute(sql, [MIN_GAMES, top_k]).fetchall()
     finally:
         con.close()
 
-    return [
-        {
-            "player_name": r[0],
-            "summary": r[1],
-            "similarity": 1.0,  # stat-matched = perfect relevance
-            "stats": {
-                "pts_per_game": r[2],
-                "reb_per_game": r[3],
-                "ast_per_game": r[4],
-                "to_per_game": r[5],
-                "stl_per_game": r[6],
-                "blk_per_game": r[7],
-                "true_shooting_pct": r[8],
-                "ast_to_tov_ratio": r[9],
-                "stocks_per_game": r[10],
-            },
-        }
+    return tuple(
+        MappingProxyType(
+            {
+                "player_name": r[0],
+                "summary": r[1],
+                "similarity": 1.0,  # stat-matched = perfect relevance
+                "stats": MappingProxyType(dict(zip(_LEADER_STATS, r[2:]))),
+            }
+        )
         for r in rows
-    ]
+    )
+
+
+# ── Approximate result cache ────────────────────────────────────
+# Paraphrases ("best defenders" / "top defenders in 2016") embed close
+# together, so a near-duplicate query can reuse the formatted results of
+# an earlier one and skip retrieval + DB hydration entirely.
+
+
+class _SemanticCache:
+    """LRU + TTL cache keyed by query embedding, matched by cosine similarity.
+
+    Cached embeddings are stored L2-normalized as rows of one preallocated
+    (max_size, d) matrix, with each entry's namespace id, creation time and
+    last use in numpy arrays aligned to those rows. A lookup is one
+    matrix-vector product plus a vectorized namespace/TTL mask. Entries live
+    in namespaces (e.g. matched stat column + top_k) so that a lookup only
+    compares against queries that would produce the same kind of result.
+    """
+
+    def __init__(self, min_similarity: float, max_size: int, ttl: float):
+        self.min_similarity = min_similarity
+        self.max_size = max_size
+        self.ttl = ttl
+        self._keys: np.ndarray | None = None  # (max_size, d) unit vectors
+        self._namespace_ids: dict[Hashable, int] = {}
+        self._namespaces = np.empty(max_size, dtype=np.int64)
+        self._created = np.empty(max_size, dtype=np.float64)
+        self._last_used = np.empty(max_size, dtype=np.int64)
+        self._values: list[str] = []
+        self._size = 0  # rows [0, _size) are filled
+        self._clock = 0  # monotonic use counter for LRU ordering
+        self._lock = Lock()
+
+    def get(self, namespace: Hashable, embedding: np.ndarray) -> str | None:
+        """Return the cached value of the most similar query, if close enough."""
+        q = (embedding / np.linalg.norm(embedding)).astype(np.float32, copy=False)
+        now = time.monotonic()
+        with self._lock:
+            namespace_id = self._namespace_ids.get(namespace)
+            if namespace_id is None:
+                return None
+
+            n = self._size
+            live = (self._namespaces[:n] == namespace_id) & (
+                now - self._created[:n] < self.ttl
+            )
+            scores = np.where(live, self._keys[:n] @ q, -np.inf)
+            best = int(np.argmax(scores))
+            # Negated so a NaN score (e.g. a zero query vector) is a miss
+            if not scores[best] >= self.min_similarity:
+                return None
+
+            self._clock += 1
+            self._last_used[best] = self._clock
+            return self._values[best]
+
+    def put(self, namespace: Hashable, embedding: np.ndarray, value: str) -> None:
+        """Insert a value, replacing an expired or least-recently-used entry if full."""
+        q = embedding / np.linalg.norm(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._clock += 1
+            if self._keys is None:
+                self._keys = np.empty((self.max_size, q.shape[0]), dtype=np.float32)
+
+            if self._size < self.max_size:
+                slot = self._size
+                self._size += 1
+                self._values.append(value)
+            else:
+                # Full: reuse the slot of an expired entry, else the LRU one
+                expired = np.flatnonzero(now - self._created >= self.ttl)
+                slot = (
+                    int(expired[0]) if expired.size else int(np.argmin(self._last_used))
+                )
+                self._values[slot] = value
+
+            self._keys[slot] = q
+            self._namespaces[slot] = self._namespace_ids.setdefault(
+                namespace, len(self._namespace_ids)
+            )
+            self._created[slot] = now
+            self._last_used[slot] = self._clock
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._keys = None
+            self._namespace_ids.clear()
+            self._values.clear()
+            self._size = 0
+
+
+_search_cache = _SemanticCache(
+    SEARCH_CACHE_MIN_SIMILARITY, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
+)
+
+
+def clear_tool_caches() -> None:
+    """Invalidate every cached tool result (call after the ETL rewrites tables)."""
+    _fetch_stat_leaders.cache_clear()
+    _search_cache.clear()
+    if _retriever is not None:
+        _retriever.clear_cache()
 
 
 def search_players(query: str, top_k: int = 5) -> str:
@@ -141,6 +308,13 @@ def search_players(query: str, top_k: int = 5) -> str:
     2. Fill remaining slots with semantic search results.
     3. If no keyword matches, fall back to pure semantic search with retry.
 
+    Keyword queries whose stat leaders fill all top_k slots return straight
+    away, without embedding the query. Everything else is cached by query
+    embedding: a query whose embedding has
+    cosine similarity >= SEARCH_CACHE_MIN_SIMILARITY with one seen in the
+    last SEARCH_CACHE_TTL seconds returns the earlier results without
+    re-running retrieval.
+
     Args:
         query: Natural language description of what to search for
         top_k: Number of results to return
@@ -148,12 +322,39 @@ def search_players(query: str, top_k: int = 5) -> str:
     Returns:
         Formatted string with player summaries and stats
     """
-    # ── Hybrid path: keyword stat leaders + semantic fill ───────
+    # Stat leaders that fill every slot are the whole answer, so a keyword
+    # query like "top scorers" never loads or runs the embedding model.
     stat_results = _get_stat_leaders(query, top_k)
+    if len(stat_results) >= top_k:
+        return _format_results(stat_results[:top_k])
+
+    retriever = get_retriever()
+    query_embedding = retriever.embed(query)
+    namespace = (_match_stat_column(query), top_k)
+
+    cached = _search_cache.get(namespace, query_embedding)
+    if cached is not None:
+        return cached
+
+    result = _search_uncached(query, top_k, query_embedding, stat_results)
+    _search_cache.put(namespace, query_embedding, result)
+    return result
+
+
+def _search_uncached(
+    query: str, top_k: int, query_embedding: np.ndarray, stat_results: list[Mapping]
+) -> str:
+    """Run the hybrid search for search_players, bypassing the cache.
+
+    stat_results are the keyword stat leaders (fewer than top_k, possibly
+    none) already fetched by search_players.
+    """
+    retriever = get_retriever()
+
+    # ── Hybrid path: keyword stat leaders + semantic fill ───────
     if stat_results:
         # Fill remaining slots with semantic results not already included
-        retriever = get_retriever()
-        semantic_results = retriever.retrieve_with_stats(query, top_k)
+        semantic_results = retriever.retrieve_with_stats(query, top_k, query_embedding)
         seen = {r["player_name"] for r in stat_results}
         for r in semantic_results:
             if r["player_name"] not in seen and len(stat_results) < top_k:
@@ -162,27 +363,45 @@ def search_players(query: str, top_k: int = 5) -> str:
         return _format_results(stat_results[:top_k])
 
     # ── Pure semantic path (no keyword matched) ─────────────────
-    retriever = get_retriever()
-    best_results = retriever.retrieve_with_stats(query, top_k)
+    best_results = retriever.retrieve_with_stats(query, top_k, query_embedding)
     best_avg = _avg_similarity(best_results)
 
     if best_avg >= SIMILARITY_THRESHOLD:
         return _format_results(best_results)
 
     # Low similarity — try broadened variations
+    results, avg = _best_variation(query, top_k)
+    if avg > best_avg:
+        best_results = results
+
+    return _format_results(best_results)
+
+
+def _best_variation(query: str, top_k: int) -> tuple[list[dict], float]:
+    """Retrieve with two broadened rephrasings of query and keep the better one.
+
+    Both variations are embedded in a single batched forward pass; each
+    retrieval is then one in-memory matrix-vector product, so they run in a
+    plain loop. Not cached itself: search_players caches the formatted
+    result of the whole search, so a repeated query never gets here.
+    """
+    retriever = get_retriever()
     variations = [
         f"{query} NBA 2016 season player stats",
         f"NBA player who {query}",
     ]
+    embeddings = retriever.embed_batch(variations)
 
-    for variation in variations:
-        results = retriever.retrieve_with_stats(variation, top_k)
+    best_results: list[dict] = []
+    best_avg = float("-inf")
+    for variation, embedding in zip(variations, embeddings):
+        results = retriever.retrieve_with_stats(variation, top_k, embedding)
         avg = _avg_similarity(results)
+        # Strictly greater, so ties keep the first variation
         if avg > best_avg:
             best_results = results
             best_avg = avg
-
-    return _format_results(best_results)
+    return best_results, best_avg
 
 
 # Tables the SQL tool is allowed to query.
@@ -191,6 +410,121 @@ ALLOWED_TABLES = {"player_season_features", "raw_player_stats"}
 # Hard cap on rows returned to keep LLM context manageable.
 MAX_ROWS = 50
 
+# Validation patterns for execute_sql
+_SELECT_RE = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+_FORBIDDEN_KEYWORDS = frozenset(
+    {
+        "INSERT",
+        "UPDATE",
+        "DELETE",
+        "DROP",
+        "ALTER",
+        "CREATE",
+        "TRUNCATE",
+        "REPLACE",
+        "MERGE",
+    }
+)
+
+
+# DuckDB types that DataFrame conversion turns into float64 columns, and
+# the ones it turns into nullable integer/boolean columns (NULL is <NA>).
+_FLOAT_TYPE_PREFIXES = ("DOUBLE", "FLOAT", "REAL", "DECIMAL", "HUGEINT")
+_INTEGER_TYPES = frozenset(
+    {
+        "TINYINT",
+        "SMALLINT",
+        "INTEGER",
+        "BIGINT",
+        "UTINYINT",
+        "USMALLINT",
+        "UINTEGER",
+        "UBIGINT",
+        "BOOLEAN",
+    }
+)
+
+
+def _format_float_column(values: list[float]) -> list[str]:
+    """Render one float column the way DataFrame.to_string does.
+
+    Every value gets 6 decimals, then trailing zeros are trimmed equally
+    across the column, keeping at least one (so 29.0 prints as "29.0" next
+    to 25.3). If a value would round away (0 < |v| < 1e-6), or a value
+    above 1e6 makes the column too wide, the whole column is printed in
+    scientific notation instead.
+    """
+    finite = [v for v in values if math.isfinite(v)]
+    fixed = [f"{v:.6f}" for v in finite]
+    trim = min((min(len(f) - len(f.rstrip("0")), 5) for f in fixed), default=0)
+    too_long = any(len(f) - trim > 12 for f in fixed)
+    if any(0 < abs(v) < 1e-6 for v in finite) or (
+        too_long and any(abs(v) > 1e6 for v in finite)
+    ):
+        float_format, trim = "{:.6e}", 0
+    else:
+        float_format = "{:.6f}"
+
+    cells = []
+    for v in values:
+        if math.isnan(v):
+            cells.append("NaN")
+        elif math.isinf(v):
+            cells.append("inf" if v > 0 else "-inf")
+        else:
+            text = float_format.format(v)
+            cells.append(text[: len(text) - trim])
+    return cells
+
+
+def _format_table(columns: list[str], rows: list[tuple], types: Sequence = ()) -> str:
+    """Format query results as a right-aligned, fixed-width text table.
+
+    Same layout as fetchdf().to_string(index=False) for numeric and text
+    columns, without building a DataFrame for what is at most MAX_ROWS rows:
+    DOUBLE, DECIMAL and HUGEINT columns (or, without types, any column
+    holding a float or Decimal) are formatted as floats with NULL as NaN,
+    integer and boolean NULLs print as <NA> and text NULLs as NaN. Numeric
+    column headers get an extra leading space.
+
+    Args:
+        columns: Column names.
+        rows: Result rows, as returned by fetchall().
+        types: Optional DuckDB column types, from cursor.description.
+    """
+    types = list(types) or [""] * len(columns)
+    labels = []
+    formatted_columns = []
+    for i, col in enumerate(columns):
+        values = [row[i] for row in rows]
+        present = [v for v in values if v is not None]
+        type_name = str(types[i])
+        is_float = type_name.startswith(_FLOAT_TYPE_PREFIXES) or any(
+            isinstance(v, (float, Decimal)) for v in present
+        )
+        numeric = (
+            is_float
+            or type_name in _INTEGER_TYPES
+            or (bool(present) and all(isinstance(v, int) for v in present))
+        )
+        labels.append(f" {col}" if numeric else col)
+        if is_float:
+            floats = [math.nan if v is None else float(v) for v in values]
+            formatted_columns.append(_format_float_column(floats))
+        else:
+            # An all-NULL text column stays object dtype, which prints None.
+            null = "<NA>" if numeric else "NaN" if present else "None"
+            formatted_columns.append([null if v is None else str(v) for v in values])
+    cells = list(zip(*formatted_columns))
+    widths = [
+        max([len(label)] + [len(row[i]) for row in cells])
+        for i, label in enumerate(labels)
+    ]
+    lines = [" ".join(label.rjust(w) for label, w in zip(labels, widths))]
+    lines.extend(" ".join(c.rjust(w) for c, w in zip(row, widths)) for row in cells)
+    return "\n".join(lines)
+
 
 def execute_sql(sql_query: str) -> str:
     """Execute a validated SELECT query against the NBA database.
@@ -210,28 +544,31 @@ def execute_sql(sql_query: str) -> str:
     normalized = sql_query.strip().rstrip(";")
 
     # Must be a SELECT
-    if not re.match(r"(?i)^\s*SELECT\b", normalized):
+    if not _SELECT_RE.match(normalized):
         return "Error: only SELECT queries are allowed."
 
+    # One tokenizing pass serves the keyword checks below. Whole words only,
+    # so identifiers like created_at are fine.
+    words = set(_WORD_RE.findall(normalized.upper()))
+
     # Block mutation keywords anywhere in the query
-    forbidden = re.compile(
-        r"\b(INSERT|UPDATE|DELETE|DROP|ALTER|CREATE|TRUNCATE|REPLACE|MERGE)\b",
-        re.IGNORECASE,
-    )
-    if forbidden.search(normalized):
+    if not _FORBIDDEN_KEYWORDS.isdisjoint(words):
         return "Error: mutation statements are not allowed."
 
     # Enforce row cap — append LIMIT if not already present
-    if not re.search(r"\bLIMIT\b", normalized, re.IGNORECASE):
+    if "LIMIT" not in words:
         normalized = f"{normalized}\nLIMIT {MAX_ROWS}"
 
     # ── Execution ───────────────────────────────────────────────
-    con = get_connection()
+    con = get_cursor()
     try:
-        df = con.execute(normalized).fetchdf()
-        if df.empty:
+        result = con.execute(normalized)
+        rows = result.fetchall()
+        if not rows:
             return "Query returned no results."
-        return df.to_string(index=False)
+        columns = [d[0] for d in result.description]
+        types = [d[1] for d in result.description]
+        return _format_table(columns, rows, types)
     except Exception as e:
         return f"SQL error: {e}"
     finally:
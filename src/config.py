@@ -1,3 +1,5 @@
+import os
+
 DB_PATH = "db/nba.duckdb"
 RAW_DATA_PATH = "data/player_stats_2016.csv"
 
@@ -5,13 +7,31 @@ MIN_GAMES = 50
 HIGH_USAGE_THRESHOLD = 25.0
 
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+QUERY_EMBEDDING_CACHE_SIZE = 2048  # exact-text query embeddings kept in memory
 
 # LLM Configuration
 DEFAULT_OLLAMA_MODEL = "qwen2.5:7b"
 OLLAMA_BASE_URL = "http://localhost:11434"
+# How long Ollama keeps the model loaded after a request (avoids cold reloads
+# between agent calls and eval cases).
+OLLAMA_KEEP_ALIVE = "30m"
 
 # Graph Configuration
 MAX_ITERATIONS = 5
 
+# Graph result cache: re-asking a question replays cached node results.
+# Off by default — main.py answers one question per process and eval.py asks
+# distinct ones. Set NBA_GRAPH_CACHE=1 for a long-lived process that repeats
+# questions.
+GRAPH_CACHE_ENABLED = os.environ.get("NBA_GRAPH_CACHE") == "1"
+GRAPH_CACHE_TTL = 3600  # seconds
+GRAPH_CACHE_SIZE = 512  # node results — about four per question
+
 # RAG Configuration
 SIMILARITY_THRESHOLD = 0.15
+
+# Semantic search cache: a query with at least this cosine similarity to a
+# cached query reuses its results instead of re-running retrieval.
+SEARCH_CACHE_MIN_SIMILARITY = 0.97
+SEARCH_CACHE_SIZE = 512
+SEARCH_CACHE_TTL = 3600  # seconds
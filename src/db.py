@@ -1,6 +1,32 @@
+import atexit
+import threading
+
 import duckdb
 from src.config import DB_PATH
 
+# Process-wide connection shared by the query path (see get_cursor).
+_shared_connection = None
+_connection_lock = threading.Lock()
+
 
 def get_connection():
     return duckdb.connect(DB_PATH)
+
+
+def get_cursor():
+    """Return a cursor on the process-wide DuckDB connection.
+
+    Opening the database file for every tool call repeats the catalog load;
+    a cursor on one long-lived connection keeps it warm. Each caller gets its
+    own cursor (closing it leaves the shared connection open), so concurrent
+    threads never share one.
+    """
+    global _shared_connection
+    if _shared_connection is None:
+        with _connection_lock:
+            # Re-check: another thread may have connected while we waited
+            if _shared_connection is None:
+                con = get_connection()
+                atexit.register(con.close)
+                _shared_connection = con
+    return _shared_connection.cursor()
@@ -22,10 +22,14 @@ The graph implements a supervisor pattern with parallel dispatch:
 Send dispatches both agents in parallel. Each writes to its own state
 field (sql_result / rag_result). After both complete, their state updates
 merge and the synthesizer sees both results.
+
+With cache=True, node results are cached on their inputs (see
+src/graph/cache.py), so a repeated question replays the earlier run instead
+of re-querying the LLM.
 """
 
 from langgraph.graph import StateGraph, START, END
-from langgraph.types import Send
+from langgraph.types import CachePolicy, Send
 
 from src.graph.state import NBAState
 from src.graph.nodes import (
@@ -34,7 +38,13 @@ from src.graph.nodes import (
     create_rag_agent,
     create_synthesizer,
 )
-from src.config import MAX_ITERATIONS
+from src.graph.cache import LRUCache, question_cache_key, synthesizer_cache_key
+from src.config import (
+    MAX_ITERATIONS,
+    GRAPH_CACHE_ENABLED,
+    GRAPH_CACHE_TTL,
+    GRAPH_CACHE_SIZE,
+)
 
 
 def route_question(state: NBAState):
@@ -74,22 +84,41 @@ def check_confidence(state: NBAState) -> str:
     return "supervisor"
 
 
-def build_graph(model_name: str | None = None):
+def build_graph(
+    model_name: str | None = None,
+    cache: bool = GRAPH_CACHE_ENABLED,
+    warm: bool = False,
+):
     """Build and compile the NBA analytics multi-agent graph.
 
     Args:
         model_name: Ollama model to use (defaults to config.DEFAULT_OLLAMA_MODEL).
+        cache: Cache node results so repeated questions skip the LLM and DB
+            (off unless NBA_GRAPH_CACHE=1). The cache belongs to the compiled
+            graph, so it is per model.
+        warm: Load the embedding model now instead of on the first RAG
+            question. Worth it for long-lived processes.
 
     Returns:
         A compiled LangGraph ready to .invoke() or .stream().
     """
     graph = StateGraph(NBAState)
+    policy = synthesizer_policy = None
+    if cache:
+        policy = CachePolicy(key_func=question_cache_key, ttl=GRAPH_CACHE_TTL)
+        synthesizer_policy = CachePolicy(
+            key_func=synthesizer_cache_key, ttl=GRAPH_CACHE_TTL
+        )
 
     # Register nodes
-    graph.add_node("supervisor", create_supervisor(model_name))
-    graph.add_node("sql_agent", create_sql_agent(model_name))
-    graph.add_node("rag_agent", create_rag_agent())
-    graph.add_node("synthesizer", create_synthesizer(model_name))
+    graph.add_node("supervisor", create_supervisor(model_name), cache_policy=policy)
+    graph.add_node("sql_agent", create_sql_agent(model_name), cache_policy=policy)
+    graph.add_node("rag_agent", create_rag_agent(warm), cache_policy=policy)
+    graph.add_node(
+        "synthesizer",
+        create_synthesizer(model_name),
+        cache_policy=synthesizer_policy,
+    )
 
     # Wire edges
     graph.add_edge(START, "supervisor")
@@ -100,4 +129,4 @@ def build_graph(model_name: str | None = None):
         "synthesizer", check_confidence, {END: END, "supervisor": "supervisor"}
     )
 
-    return graph.compile()
+    return graph.compile(cache=LRUCache(GRAPH_CACHE_SIZE) if cache else None)
@@ -0,0 +1,117 @@
+"""Node-result cache for the NBA analytics graph.
+
+LangGraph skips a node whose CachePolicy key it has seen before and replays
+the stored state update instead. When enabled, build_graph attaches a policy
+to every node keyed on what that node reads: the supervisor and the agents
+on the question and feedback-loop iteration, the synthesizer also on the
+agents' results. Asking the same question again then replays the whole run
+without calling Ollama or DuckDB.
+
+LangGraph's bundled InMemoryCache never evicts; LRUCache is the same store
+with a size cap. Cached results go stale when the ETL rewrites the tables,
+so run_pipeline calls clear_graph_caches.
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+from langgraph.cache.base import BaseCache, FullKey, Namespace
+
+# A stored entry: (serialized value, expiry timestamp or None)
+_Entry = tuple[tuple[str, bytes], float | None]
+
+
+# Every LRUCache in the process, so clear_graph_caches can reach them all
+_live_caches: "weakref.WeakSet[LRUCache]" = weakref.WeakSet()
+
+
+def question_cache_key(state: dict) -> str:
+    """Cache key for a node run: loop iteration + the user's question."""
+    return f"{state.get('iteration', 0)}:{state['messages'][0].content}"
+
+
+def synthesizer_cache_key(state: dict) -> str:
+    """Cache key for a synthesizer run: iteration, question and both results.
+
+    The answer depends on the retrieved data, so an entry can't be replayed
+    against sql_result / rag_result that were recomputed after eviction.
+    Given the same data, the answer doesn't depend on case or spacing, so
+    the question is lowercased and whitespace-collapsed here: a variant that
+    missed the agents' cache can still reuse the earlier answer.
+    """
+    question = " ".join(state["messages"][0].content.lower().split())
+    return "\0".join(
+        (
+            f"{state.get('iteration', 0)}:{question}",
+            state.get("sql_result", ""),
+            state.get("rag_result", ""),
+        )
+    )
+
+
+def clear_graph_caches() -> None:
+    """Drop cached node results in every compiled graph (call after the ETL)."""
+    for cache in list(_live_caches):
+        cache.clear()
+
+
+class LRUCache(BaseCache):
+    """Thread-safe, size-bounded LangGraph cache with per-entry TTL.
+
+    Values are stored serialized (like InMemoryCache) so a replayed state
+    update can't be mutated by the run that consumes it.
+    """
+
+    def __init__(self, maxsize: int, **kwargs):
+        super().__init__(**kwargs)
+        self.maxsize = maxsize
+        self._entries: OrderedDict[FullKey, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        _live_caches.add(self)
+
+    def get(self, keys: Sequence[FullKey]) -> dict:
+        now = time.time()
+        values = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                payload, expiry = entry
+                if expiry is not None and now >= expiry:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                values[key] = self.serde.loads_typed(payload)
+        return values
+
+    async def aget(self, keys: Sequence[FullKey]) -> dict:
+        return self.get(keys)
+
+    def set(self, pairs: Mapping[FullKey, tuple[object, int | None]]) -> None:
+        now = time.time()
+        with self._lock:
+            for key, (value, ttl) in pairs.items():
+                expiry = now + ttl if ttl is not None else None
+                self._entries[key] = (self.serde.dumps_typed(value), expiry)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def aset(self, pairs: Mapping[FullKey, tuple[object, int | None]]) -> None:
+        self.set(pairs)
+
+    def clear(self, namespaces: Sequence[Namespace] | None = None) -> None:
+        with self._lock:
+            if namespaces is None:
+                self._entries.clear()
+                return
+            dropped = {tuple(ns) for ns in namespaces}
+            for key in [k for k in self._entries if tuple(k[0]) in dropped]:
+                del self._entries[key]
+
+    async def aclear(self, namespaces: Sequence[Namespace] | None = None) -> None:
+        self.clear(namespaces)
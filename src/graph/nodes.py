@@ -9,13 +9,25 @@ Nodes in the multi-agent system:
 - synthesizer:  merges results into a final answer, checks data quality
 """
 
-from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage
+import re
+from functools import lru_cache
+
+from langchain_core.messages import (
+    AIMessage,
+    SystemMessage,
+    HumanMessage,
+    ToolMessage,
+)
 from langchain_ollama import ChatOllama
 
 from src.graph.tools import query_db, sql_tools
 from src.graph.state import NBAState
-from src.config import DEFAULT_OLLAMA_MODEL, OLLAMA_BASE_URL
-from src.agent.tools import search_players as raw_search_players
+from src.config import (
+    DEFAULT_OLLAMA_MODEL,
+    OLLAMA_BASE_URL,
+    OLLAMA_KEEP_ALIVE,
+)
+from src.agent.tools import search_players as raw_search_players, warm_retriever
 
 
 # ── Helpers ─────────────────────────────────────────────────────
@@ -27,14 +39,27 @@ def _get_question(state: NBAState) -> str:
 
 
 def _make_llm(model_name: str | None = None):
-    """Create a base ChatOllama instance."""
+    """Return the shared base ChatOllama instance for a model."""
+    return _shared_llm(model_name or DEFAULT_OLLAMA_MODEL)
+
+
+@lru_cache(maxsize=None)
+def _shared_llm(model: str) -> ChatOllama:
+    """Create one ChatOllama per model.
+
+    Every node (and every build_graph call) shares it, so they reuse one
+    HTTP connection pool instead of each opening their own.
+    """
     return ChatOllama(
-        model=model_name or DEFAULT_OLLAMA_MODEL,
+        model=model,
         base_url=OLLAMA_BASE_URL,
+        keep_alive=OLLAMA_KEEP_ALIVE,
     )
 
 
 # ── Supervisor ──────────────────────────────────────────────────
+# Each prompt's SystemMessage is built once and reused, so every call sends
+# a byte-identical prefix that backends with prefix caching can reuse.
 
 SUPERVISOR_PROMPT = """\
 Classify this NBA analytics question into ONE category.
@@ -49,29 +74,50 @@ Respond with EXACTLY one word — no explanation.
 - both: when unsure, or when the question needs stats AND descriptions
 
 Respond with one word: sql, semantic, or both"""
+_SUPERVISOR_SYSTEM = SystemMessage(content=SUPERVISOR_PROMPT)
+
+# Fast-path cues mirroring the prompt's own examples. Whole words only, so
+# "stop" or "almost" don't count as ranking.
+_RANKING_RE = re.compile(r"\b(best|top|most|highest|lowest|rank\w*|compare)\b")
+_DESCRIPTIVE_RE = re.compile(r"\b(describe|what kind|play ?style|similar to|like)\b")
+
+
+def _normalize_question(question: str) -> str:
+    """Lowercase and collapse whitespace, so trivial rephrasings compare equal."""
+    return " ".join(question.lower().split())
+
+
+def _keyword_route(question: str) -> str | None:
+    """Route clear-cut questions without the LLM; None when there are no cues."""
+    q = question.lower()
+    ranking = _RANKING_RE.search(q) is not None
+    descriptive = _DESCRIPTIVE_RE.search(q) is not None
+    if ranking and descriptive:
+        return "both"
+    if ranking:
+        return "sql"
+    if descriptive:
+        return "semantic"
+    return None
 
 
 def create_supervisor(model_name: str | None = None):
     """Create the supervisor node.
 
-    The supervisor makes a single lightweight LLM call to classify the
-    question. This replaces the old keyword-matching _select_tools().
+    Questions with clear ranking or descriptive cues are routed by keyword
+    (see _keyword_route). Anything else gets a single lightweight LLM call
+    to classify the question; its answers are cached per normalized
+    question, so rephrasings that differ only in case or spacing reuse it.
 
     On retry (iteration > 0), it always picks "both" for maximum coverage.
     """
     llm = _make_llm(model_name)
 
-    def supervisor(state: NBAState) -> dict:
-        iteration = state.get("iteration", 0)
-
-        # On retry, widen the net — use both agents
-        if iteration > 0:
-            return {"route": "both"}
-
-        question = _get_question(state)
+    @lru_cache(maxsize=1024)
+    def classify(question: str) -> str:
         response = llm.invoke(
             [
-                SystemMessage(content=SUPERVISOR_PROMPT),
+                _SUPERVISOR_SYSTEM,
                 HumanMessage(content=question),
             ]
         )
@@ -79,11 +125,22 @@ def create_supervisor(model_name: str | None = None):
         # Parse the classification loosely — default to "both" on ambiguity
         text = response.content.strip().lower()
         if "sql" in text and "semantic" not in text and "both" not in text:
-            route = "sql"
-        elif "semantic" in text and "sql" not in text and "both" not in text:
-            route = "semantic"
-        else:
-            route = "both"
+            return "sql"
+        if "semantic" in text and "sql" not in text and "both" not in text:
+            return "semantic"
+        return "both"
+
+    def supervisor(state: NBAState) -> dict:
+        iteration = state.get("iteration", 0)
+
+        # On retry, widen the net — use both agents
+        if iteration > 0:
+            return {"route": "both"}
+
+        question = _get_question(state)
+        route = _keyword_route(question)
+        if route is None:
+            route = classify(_normalize_question(question))
 
         return {"route": route}
 
@@ -137,6 +194,7 @@ Q: "compare LeBron and Curry"
 SELECT player_name, pts_per_game, reb_per_game, ast_per_game, stl_per_game, blk_per_game FROM player_season_features WHERE player_name IN ('LeBron James', 'Stephen Curry')
 
 If a query errors, read the error and try a corrected query."""
+_SQL_AGENT_SYSTEM = SystemMessage(content=SQL_AGENT_PROMPT)
 
 
 def create_sql_agent(model_name: str | None = None):
@@ -153,7 +211,7 @@ def create_sql_agent(model_name: str | None = None):
     def sql_agent(state: NBAState) -> dict:
         question = _get_question(state)
         internal_msgs = [
-            SystemMessage(content=SQL_AGENT_PROMPT),
+            _SQL_AGENT_SYSTEM,
             HumanMessage(content=question),
         ]
 
@@ -184,7 +242,7 @@ def create_sql_agent(model_name: str | None = None):
 # ── RAG Agent ───────────────────────────────────────────────────
 
 
-def create_rag_agent():
+def create_rag_agent(warm: bool = False):
     """Create the RAG (semantic search) specialist agent.
 
     No LLM call needed — this agent calls the search_players function
@@ -192,7 +250,13 @@ def create_rag_agent():
     Interpretation happens later in the synthesizer.
 
     Writes results to state["rag_result"] — not to messages.
+
+    With warm=True the retriever loads the embedding model here, at graph
+    build time, so the first question doesn't pay for it. Leave it off for
+    one-shot runs that may never reach the RAG agent.
     """
+    if warm:
+        warm_retriever()
 
     def rag_agent(state: NBAState) -> dict:
         question = _get_question(state)
@@ -211,6 +275,7 @@ data below. Rules:
 2. If data is empty or contains errors, say so honestly.
 3. Lead with the direct answer, then cite supporting numbers.
 4. Be concise — no filler."""
+_SYNTHESIZER_SYSTEM = SystemMessage(content=SYNTHESIZER_PROMPT)
 
 
 def create_synthesizer(model_name: str | None = None):
@@ -237,8 +302,6 @@ def create_synthesizer(model_name: str | None = None):
             context_parts.append(f"=== Semantic Search Results ===\n{rag_result}")
 
         if not context_parts:
-            from langchain_core.messages import AIMessage
-
             return {
                 "messages": [
                     AIMessage(
@@ -252,7 +315,7 @@ def create_synthesizer(model_name: str | None = None):
 
         response = llm.invoke(
             [
-                SystemMessage(content=SYNTHESIZER_PROMPT),
+                _SYNTHESIZER_SYSTEM,
                 HumanMessage(
                     content=f"Question: {question}\n\nAvailable Data:\n{context}"
                 ),
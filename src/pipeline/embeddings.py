@@ -1,14 +1,16 @@
 """Build vector embeddings for player summaries."""
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
+import polars as pl
 from src.db import get_connection
+from src.retrieval.semantic import get_embedding_model
 from src.config import EMBEDDING_MODEL
 
 
 def build_embeddings():
     """Encode player summaries into vector embeddings."""
     con = get_connection()
-    model = SentenceTransformer(EMBEDDING_MODEL)
+    model = get_embedding_model()
 
     rows = con.execute("""
         SELECT player_name, summary
@@ -16,15 +18,30 @@ def build_embeddings():
     """).fetchall()
 
     print(f"  Encoding {len(rows)} summaries...")
-    embeddings = [(name, model.encode(summary).tolist()) for name, summary in rows]
+    names = [name for name, _ in rows]
+    # One batched encode instead of a forward pass per summary. Vectors are
+    # stored unit-length, so cosine similarity against them is a dot product.
+    vectors = model.encode(
+        [summary for _, summary in rows],
+        batch_size=64,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    vectors = np.asarray(vectors, dtype=np.float32)
+    dim = vectors.shape[1]
 
-    con.execute("""
-        CREATE OR REPLACE TABLE player_embeddings (
-            player_name TEXT,
-            embedding FLOAT[]
-        )
+    # Fixed-size FLOAT[dim] column: the retriever loads it back as one
+    # contiguous matrix instead of converting a list per row
+    embeddings = pl.DataFrame(
+        {"player_name": names, "embedding": vectors},
+        schema={"player_name": pl.String, "embedding": pl.Array(pl.Float32, dim)},
+    )
+    con.register("embeddings", embeddings)
+    con.execute(f"""
+        CREATE OR REPLACE TABLE player_embeddings AS
+        SELECT player_name, embedding::FLOAT[{dim}] AS embedding
+        FROM embeddings
     """)
-
-    con.executemany("INSERT INTO player_embeddings VALUES (?, ?)", embeddings)
     con.close()
     print(f"✓ Built embeddings ({EMBEDDING_MODEL})")
@@ -1,22 +1,27 @@
 """Raw data ingestion from CSV to DuckDB."""
 
-import polars as pl
 from src.db import get_connection
 from src.config import RAW_DATA_PATH
 
 
 def ingest_raw_data():
-    """Load raw player stats CSV into DuckDB."""
-    player_stats = pl.read_csv(RAW_DATA_PATH).with_columns(
-        [
-            pl.col("firstName").str.replace("'", " ").alias("firstName"),
-            pl.col("lastName").str.replace("'", " ").alias("lastName"),
-        ]
-    )
+    """Load raw player stats CSV into DuckDB.
 
+    DuckDB's own CSV reader parses the file straight into the table, with
+    apostrophes in names replaced by spaces on the way in.
+    """
     con = get_connection()
     con.execute(
-        "CREATE OR REPLACE TABLE raw_player_stats AS SELECT * FROM player_stats"
+        """
+        CREATE OR REPLACE TABLE raw_player_stats AS
+        SELECT * REPLACE (
+            replace(firstName, '''', ' ') AS firstName,
+            replace(lastName, '''', ' ') AS lastName
+        )
+        FROM read_csv_auto(?)
+        """,
+        [RAW_DATA_PATH],
     )
+    count = con.execute("SELECT count(*) FROM raw_player_stats").fetchone()[0]
     con.close()
-    print(f"✓ Ingested raw data ({player_stats.count()[0]} rows) from {RAW_DATA_PATH}")
+    print(f"✓ Ingested raw data ({count} rows) from {RAW_DATA_PATH}")
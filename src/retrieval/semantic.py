@@ -1,14 +1,37 @@
 """Semantic retrieval using vector embeddings."""
 
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from src.db import get_connection
-from src.config import EMBEDDING_MODEL
+from src.db import get_cursor
+from src.config import EMBEDDING_MODEL, QUERY_EMBEDDING_CACHE_SIZE
+
 
+@lru_cache(maxsize=1)
+def get_embedding_model() -> SentenceTransformer:
+    """Load the sentence-transformers model once per process.
+
+    Shared by the ETL (build_embeddings) and the retriever, so running
+    --setup and then asking questions loads the weights only once.
+    """
+    return SentenceTransformer(EMBEDDING_MODEL)
 
-def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    """Compute cosine similarity between two vectors."""
-    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+# Structured stats attached to each result by retrieve_with_stats
+STATS_COLUMNS = (
+    "games_played",
+    "pts_per_game",
+    "reb_per_game",
+    "ast_per_game",
+    "stl_per_game",
+    "blk_per_game",
+    "true_shooting_pct",
+    "ast_to_tov_ratio",
+    "stocks_per_game",
+)
 
 
 class SemanticRetriever:
@@ -20,33 +43,114 @@ class SemanticRetriever:
     """
 
     def __init__(self):
-        self.model = SentenceTransformer(EMBEDDING_MODEL)
+        self.model = get_embedding_model()
         self._embeddings_cache = None
+        # LRU of query text → embedding, filled by embed()
+        self._query_embeddings: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_lock = Lock()
 
     def _load_embeddings(self):
-        """Load all embeddings from database (cached)."""
+        """Load all embeddings from database (cached).
+
+        Returns (names, summaries, stats, matrix): parallel name/summary
+        lists, a player name → stats dict mapping (players without a
+        features row are absent), and an (N, D) float32 matrix of
+        L2-normalized embeddings, one row per player. Summaries and stats
+        come from the same query, so retrieval never goes back to the
+        database.
+        """
         if self._embeddings_cache is not None:
             return self._embeddings_cache
 
-        con = get_connection()
-        rows = con.execute("""
-            SELECT e.player_name, e.embedding, s.summary
+        stats_select = ", ".join(f"f.{c}" for c in STATS_COLUMNS)
+        con = get_cursor()
+        players = con.execute(f"""
+            SELECT
+                e.player_name,
+                e.embedding,
+                s.summary,
+                f.player_name IS NOT NULL AS has_stats,
+                {stats_select}
             FROM player_embeddings e
             JOIN player_summaries s USING (player_name)
-        """).fetchall()
+            LEFT JOIN player_season_features f USING (player_name)
+        """).pl()
         con.close()
 
-        self._embeddings_cache = [
-            {
-                "player_name": row[0],
-                "embedding": np.array(row[1]),
-                "summary": row[2],
-            }
-            for row in rows
-        ]
+        # Flatten the embedding column into one (N, D) matrix in a single
+        # copy, rather than building an array per row
+        names = players["player_name"].to_list()
+        summaries = players["summary"].to_list()
+        stats = {
+            name: row
+            for name, row, has in zip(
+                names,
+                players.select(STATS_COLUMNS).to_dicts(),
+                players["has_stats"].to_list(),
+            )
+            if has
+        }
+        if players.height:
+            matrix = players["embedding"].explode().to_numpy()
+            matrix = matrix.astype(np.float32).reshape(players.height, -1)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1.0, norms)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+
+        self._embeddings_cache = (names, summaries, stats, matrix)
         return self._embeddings_cache
 
-    def retrieve_by_question(self, question: str, top_k: int = 5) -> list[dict]:
+    def warm_up(self):
+        """Load embeddings and run one throwaway encode.
+
+        Moves model initialization and the first DB read out of the first
+        real query.
+        """
+        self._load_embeddings()
+        self.embed("warm up")
+
+    def clear_cache(self):
+        """Drop cached embeddings so the next retrieval reloads them."""
+        self._embeddings_cache = None
+
+    def embed(self, text: str) -> np.ndarray:
+        """Encode text into the same vector space as the player summaries.
+
+        Embeddings are cached by exact text, so a repeated query skips the
+        transformer forward pass. The returned array is read-only.
+        """
+        with self._query_lock:
+            cached = self._query_embeddings.get(text)
+            if cached is not None:
+                self._query_embeddings.move_to_end(text)
+                return cached
+
+        embedding = self.model.encode(text)
+        embedding.flags.writeable = False
+        with self._query_lock:
+            self._query_embeddings[text] = embedding
+            self._query_embeddings.move_to_end(text)
+            while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        """Encode several one-off queries in one forward pass (not cached).
+
+        Returns an (len(texts), D) array; (0, D) for an empty list.
+        """
+        if not texts:
+            dim = self.model.get_sentence_embedding_dimension()
+            return np.empty((0, dim), dtype=np.float32)
+        return self.model.encode(texts, batch_size=len(texts))
+
+    def retrieve_by_question(
+        self,
+        question: str,
+        top_k: int = 5,
+        query_embedding: np.ndarray | None = None,
+    ) -> list[dict]:
         """
         Find players most relevant to the question using semantic similarity.
 
@@ -56,66 +160,60 @@ class SemanticRetriever:
         Args:
             question: Natural language question about NBA players
             top_k: Number of results to return
+            query_embedding: Precomputed embedding of the question, if the
+                caller already has one (skips re-encoding)
 
         Returns:
             List of dicts with player_name, summary, and similarity score
         """
         # Encode the question into the same vector space
-        question_embedding = self.model.encode(question)
-
-        # Load all player embeddings
-        all_players = self._load_embeddings()
-
-        # Compute similarity between question and each player summary
-        results = []
-        for player in all_players:
-            similarity = cosine_similarity(question_embedding, player["embedding"])
-            results.append(
-                {
-                    "player_name": player["player_name"],
-                    "summary": player["summary"],
-                    "similarity": similarity,
-                }
-            )
-
-        # Sort by similarity (highest first) and return top_k
-        results.sort(key=lambda x: x["similarity"], reverse=True)
-        return results[:top_k]
+        if query_embedding is None:
+            query_embedding = self.embed(question)
+
+        names, summaries, _, matrix = self._load_embeddings()
+        if not names:
+            return []
+
+        # Cosine similarity against every player at once: rows are unit
+        # length, so it's one matrix-vector product with the unit query
+        q = np.asarray(query_embedding, dtype=np.float32)
+        similarities = matrix @ (q / np.linalg.norm(q))
+
+        # Select the top_k in O(N), then sort only those (highest first,
+        # ties by table order)
+        if top_k < len(names):
+            top = np.argpartition(-similarities, top_k)[:top_k]
+        else:
+            top = np.arange(len(names))
+        order = top[np.lexsort((top, -similarities[top]))]
+        return [
+            {
+                "player_name": names[i],
+                "summary": summaries[i],
+                "similarity": float(similarities[i]),
+            }
+            for i in order
+        ]
 
-    def retrieve_with_stats(self, question: str, top_k: int = 5) -> list[dict]:
+    def retrieve_with_stats(
+        self,
+        question: str,
+        top_k: int = 5,
+        query_embedding: np.ndarray | None = None,
+    ) -> list[dict]:
         """
         Retrieve players with both their summaries and structured stats.
 
         Combines semantic retrieval with structured data for richer context.
         """
         # Get semantically relevant players
-        relevant = self.retrieve_by_question(question, top_k)
-        player_names = [r["player_name"] for r in relevant]
-
-        # Fetch their structured stats
-        con = get_connection()
-        placeholders = ",".join(f"'{name}'" for name in player_names)
-        stats = con.execute(f"""
-            SELECT
-                player_name,
-                games_played,
-                pts_per_game,
-                reb_per_game,
-                ast_per_game,
-                stl_per_game,
-                blk_per_game,
-                true_shooting_pct,
-                ast_to_tov_ratio,
-                stocks_per_game
-            FROM player_season_features
-            WHERE player_name IN ({placeholders})
-        """).fetchdf()
-        con.close()
+        relevant = self.retrieve_by_question(question, top_k, query_embedding)
 
-        # Merge stats into results
-        stats_dict = stats.set_index("player_name").to_dict("index")
+        # Attach their structured stats (loaded alongside the embeddings)
+        _, _, stats, _ = self._load_embeddings()
         for r in relevant:
-            if r["player_name"] in stats_dict:
-                r["stats"] = stats_dict[r["player_name"]]
+            player_stats = stats.get(r["player_name"])
+            if player_stats is not None:
+                r["stats"] = dict(player_stats)
 
         return relevant
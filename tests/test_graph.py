@@ -5,31 +5,52 @@ Strategy:
   No mocking needed — we just pass in hand-crafted state dicts.
 - The supervisor contains LLM-dependent logic, so we mock ChatOllama to return
   controlled responses and verify the parsing produces the correct route.
+- The node cache is plain in-process state; TTL expiry is tested by patching
+  time.time.
 """
 
-from unittest.mock import patch, MagicMock
+from itertools import count
+from typing import ClassVar
+from unittest.mock import patch, Mock
 
+import pytest
 from langchain_core.messages import HumanMessage, AIMessage
 from langgraph.graph import END
 
 from src.graph.builder import route_question, check_confidence
-from src.graph.nodes import create_supervisor
+from src.graph.cache import (
+    LRUCache,
+    clear_graph_caches,
+    question_cache_key,
+    synthesizer_cache_key,
+)
+from src.graph.nodes import create_supervisor, _keyword_route
 from src.config import MAX_ITERATIONS
 
 
 # ── Helpers ─────────────────────────────────────────────────────
 
+# Shared by every default state; no test mutates it.
+_TEST_MSG = HumanMessage(content="test question")
+
+_DEFAULT_STATE = {
+    "messages": [_TEST_MSG],
+    "route": "both",
+    "sql_result": "",
+    "rag_result": "",
+    "iteration": 0,
+}
+
 
 def _make_state(**overrides) -> dict:
-    """Build a minimal NBAState dict for testing."""
-    state = {
-        "messages": [HumanMessage(content="test question")],
-        "route": "both",
-        "sql_result": "",
-        "rag_result": "",
-        "iteration": 0,
-    }
-    state.update(overrides)
+    """Build a minimal NBAState dict for testing.
+
+    A shallow copy of _DEFAULT_STATE — replace "messages" rather than
+    appending to it.
+    """
+    state = _DEFAULT_STATE.copy()
+    if overrides:
+        state.update(overrides)
     return state
 
 
@@ -37,64 +58,51 @@ def _make_state(**overrides) -> dict:
 # Pure function: reads state["route"], returns Send objects.
 
 
-class TestRouteQuestion:
-    def test_sql_dispatches_sql_agent_only(self):
-        sends = route_question(_make_state(route="sql"))
-        assert len(sends) == 1
-        assert sends[0].node == "sql_agent"
-
-    def test_semantic_dispatches_rag_agent_only(self):
-        sends = route_question(_make_state(route="semantic"))
-        assert len(sends) == 1
-        assert sends[0].node == "rag_agent"
-
-    def test_both_dispatches_two_agents(self):
-        sends = route_question(_make_state(route="both"))
-        assert len(sends) == 2
-        nodes = {s.node for s in sends}
-        assert nodes == {"sql_agent", "rag_agent"}
-
-    def test_unknown_route_defaults_to_rag(self):
-        """Any unrecognized route falls through to the else branch (rag_agent)."""
-        sends = route_question(_make_state(route="garbage"))
-        assert len(sends) == 1
-        assert sends[0].node == "rag_agent"
+@pytest.mark.parametrize(
+    "route,expected_nodes",
+    [
+        ("sql", ["sql_agent"]),
+        ("semantic", ["rag_agent"]),
+        ("both", ["sql_agent", "rag_agent"]),
+        # Any unrecognized route falls through to the else branch (rag_agent)
+        ("garbage", ["rag_agent"]),
+    ],
+)
+def test_route_question(route, expected_nodes):
+    sends = route_question(_make_state(route=route))
+    assert sorted(s.node for s in sends) == sorted(expected_nodes)
 
 
 # ── check_confidence ────────────────────────────────────────────
 # Pure function: reads sql_result, rag_result, iteration → END or "supervisor".
 
 
-class TestCheckConfidence:
-    def test_ends_when_sql_has_data(self):
-        state = _make_state(sql_result="player_name\nLeBron James")
-        assert check_confidence(state) == END
-
-    def test_ends_when_rag_has_data(self):
-        state = _make_state(rag_result="1. LeBron James (similarity: 0.9)")
-        assert check_confidence(state) == END
-
-    def test_retries_when_both_empty(self):
-        state = _make_state(sql_result="", rag_result="", iteration=0)
-        assert check_confidence(state) == "supervisor"
-
-    def test_retries_on_sql_error(self):
-        state = _make_state(sql_result="SQL error: no such column", rag_result="")
-        assert check_confidence(state) == "supervisor"
-
-    def test_retries_on_no_results(self):
-        state = _make_state(sql_result="Query returned no results.", rag_result="")
-        assert check_confidence(state) == "supervisor"
-
-    def test_ends_at_max_iterations_even_with_no_data(self):
-        """Safety cap: stop retrying after MAX_ITERATIONS regardless of data."""
-        state = _make_state(sql_result="", rag_result="", iteration=MAX_ITERATIONS)
-        assert check_confidence(state) == END
-
-    def test_ends_when_only_rag_whitespace(self):
-        """Whitespace-only RAG result is treated as empty → retry."""
-        state = _make_state(sql_result="", rag_result="   ", iteration=0)
-        assert check_confidence(state) == "supervisor"
+@pytest.mark.parametrize(
+    "state_kwargs,expected",
+    [
+        pytest.param(
+            {"sql_result": "player_name\nLeBron James"}, END, id="sql_has_data"
+        ),
+        pytest.param(
+            {"rag_result": "1. LeBron James (similarity: 0.9)"}, END, id="rag_has_data"
+        ),
+        pytest.param({}, "supervisor", id="both_empty"),
+        pytest.param(
+            {"sql_result": "SQL error: no such column"}, "supervisor", id="sql_error"
+        ),
+        pytest.param(
+            {"sql_result": "Query returned no results."},
+            "supervisor",
+            id="no_results",
+        ),
+        # Safety cap: stop retrying after MAX_ITERATIONS regardless of data
+        pytest.param({"iteration": MAX_ITERATIONS}, END, id="max_iterations"),
+        # Whitespace-only RAG result is treated as empty → retry
+        pytest.param({"rag_result": "   "}, "supervisor", id="rag_whitespace"),
+    ],
+)
+def test_check_confidence(state_kwargs, expected):
+    assert check_confidence(_make_state(**state_kwargs)) == expected
 
 
 # ── Supervisor response parsing ─────────────────────────────────
@@ -103,43 +111,190 @@ class TestCheckConfidence:
 # matching, not the LLM's ability to classify.
 
 
+@pytest.fixture(scope="module")
+def parsing_supervisor():
+    """One supervisor with a mocked LLM, built once for the whole module.
+
+    The supervisor grabs its LLM when it is created, so the patch only needs
+    to cover create_supervisor.
+    """
+    mock_llm = Mock(spec=["invoke"])
+    with patch("src.graph.nodes._make_llm", return_value=mock_llm):
+        supervisor_fn = create_supervisor("fake-model")
+    return supervisor_fn, mock_llm
+
+
 class TestSupervisorParsing:
     """Test that the supervisor correctly parses LLM classification responses."""
 
+    # One supervisor serves every test. Its classifications are cached per
+    # question, so every run asks a fresh one.
+    _question_ids = count()
+
+    # (LLM response, expected route)
+    _PARSE_CASES = (
+        ("sql", "sql"),
+        ("semantic", "semantic"),
+        ("both", "both"),
+        # Case-insensitive, surrounding whitespace ignored
+        ("SQL", "sql"),
+        ("SEMANTIC", "semantic"),
+        ("  sql  \n", "sql"),
+        # Anything unexpected defaults to "both"
+        ("I think sql and semantic", "both"),
+        ("not sure", "both"),
+    )
+    # Every response the tests feed the LLM, built once
+    _RESPONSES: ClassVar[dict[str, AIMessage]] = {
+        text: AIMessage(content=text) for text, _ in _PARSE_CASES
+    }
+
+    @pytest.fixture(autouse=True)
+    def _use_supervisor(self, parsing_supervisor):
+        self.supervisor_fn, self.mock_llm = parsing_supervisor
+
     def _run_supervisor(self, llm_response_text: str, iteration: int = 0) -> str:
-        """Helper: create supervisor, mock LLM to return given text, return route."""
-        with patch("src.graph.nodes._make_llm") as mock_make_llm:
-            mock_llm = MagicMock()
-            mock_llm.invoke.return_value = AIMessage(content=llm_response_text)
-            mock_make_llm.return_value = mock_llm
+        """Helper: make the mocked LLM return the given text, return the route."""
+        self.mock_llm.invoke.return_value = self._RESPONSES[llm_response_text]
+        question = f"test question {next(self._question_ids)}"
+        state = _make_state(
+            messages=[HumanMessage(content=question)], iteration=iteration
+        )
+        return self.supervisor_fn(state)["route"]
+
+    @pytest.mark.parametrize("response,expected", _PARSE_CASES)
+    def test_parses_response(self, response, expected):
+        assert self._run_supervisor(response) == expected
+
+    @pytest.mark.parametrize("response,iteration", [("sql", 1), ("semantic", 2)])
+    def test_retry_always_returns_both(self, response, iteration):
+        """On retry (iteration > 0), supervisor skips LLM and returns 'both'."""
+        assert self._run_supervisor(response, iteration=iteration) == "both"
 
+    def test_repeat_question_reuses_classification(self):
+        """Questions differing only in case/spacing share one LLM call."""
+        with patch("src.graph.nodes._make_llm") as mock_make_llm:
+            mock_llm = mock_make_llm.return_value
+            mock_llm.invoke.return_value = AIMessage(content="semantic")
             supervisor_fn = create_supervisor("fake-model")
-            state = _make_state(iteration=iteration)
-            result = supervisor_fn(state)
-            return result["route"]
 
-    def test_parses_sql(self):
-        assert self._run_supervisor("sql") == "sql"
+            for text in ("How did Kawhi do?", "  how did   KAWHI do? "):
+                state = _make_state(messages=[HumanMessage(content=text)])
+                assert supervisor_fn(state) == {"route": "semantic"}
 
-    def test_parses_semantic(self):
-        assert self._run_supervisor("semantic") == "semantic"
+            assert mock_llm.invoke.call_count == 1
 
-    def test_parses_both(self):
-        assert self._run_supervisor("both") == "both"
 
-    def test_case_insensitive(self):
-        assert self._run_supervisor("SQL") == "sql"
-        assert self._run_supervisor("SEMANTIC") == "semantic"
+# ── Supervisor keyword fast path ────────────────────────────────
+# Pure function: question text → route, or None to defer to the LLM.
 
-    def test_extra_whitespace(self):
-        assert self._run_supervisor("  sql  \n") == "sql"
 
-    def test_ambiguous_defaults_to_both(self):
-        """If the LLM returns something unexpected, default to 'both'."""
-        assert self._run_supervisor("I think sql and semantic") == "both"
-        assert self._run_supervisor("not sure") == "both"
+class TestKeywordRoute:
+    def test_ranking_routes_to_sql(self):
+        assert _keyword_route("Who were the best defenders?") == "sql"
+        assert _keyword_route("Which player had the MOST blocks") == "sql"
 
-    def test_retry_always_returns_both(self):
-        """On retry (iteration > 0), supervisor skips LLM and returns 'both'."""
-        assert self._run_supervisor("sql", iteration=1) == "both"
-        assert self._run_supervisor("semantic", iteration=2) == "both"
+    def test_descriptive_routes_to_semantic(self):
+        assert _keyword_route("Describe LeBron's play style") == "semantic"
+        assert _keyword_route("What kind of player is Curry?") == "semantic"
+
+    def test_both_cues_route_to_both(self):
+        assert _keyword_route("Describe the top scorers") == "both"
+
+    def test_no_cues_defer_to_llm(self):
+        assert _keyword_route("How did Kawhi do in 2016?") is None
+
+    def test_matches_whole_words_only(self):
+        """'stop' and 'almost' must not be read as 'top' and 'most'."""
+        assert _keyword_route("Who could stop Harden almost every night?") is None
+
+    def test_supervisor_skips_llm_on_keyword_hit(self):
+        with patch("src.graph.nodes._make_llm") as mock_make_llm:
+            supervisor_fn = create_supervisor("fake-model")
+            state = _make_state(messages=[HumanMessage(content="top rebounders")])
+            assert supervisor_fn(state) == {"route": "sql"}
+            mock_make_llm.return_value.invoke.assert_not_called()
+
+
+# ── Node cache ──────────────────────────────────────────────────
+
+
+class TestQuestionCacheKey:
+    def test_same_question_same_key(self):
+        assert question_cache_key(_make_state()) == question_cache_key(
+            _make_state(route="sql", sql_result="stale")
+        )
+
+    def test_iteration_changes_key(self):
+        assert question_cache_key(_make_state(iteration=0)) != question_cache_key(
+            _make_state(iteration=1)
+        )
+
+    def test_question_changes_key(self):
+        other = _make_state(messages=[HumanMessage(content="another question")])
+        assert question_cache_key(_make_state()) != question_cache_key(other)
+
+    def test_synthesizer_key_includes_agent_results(self):
+        """A replayed answer must match the data the agents just returned."""
+        base = synthesizer_cache_key(_make_state(sql_result="rows"))
+        assert base == synthesizer_cache_key(_make_state(sql_result="rows"))
+        assert base != synthesizer_cache_key(_make_state(sql_result="new rows"))
+        assert base != synthesizer_cache_key(
+            _make_state(sql_result="rows", rag_result="players")
+        )
+
+    def test_synthesizer_key_ignores_case_and_spacing(self):
+        """Same data, trivially rephrased question: reuse the answer."""
+        variant = [HumanMessage(content=f"  {_TEST_MSG.content.upper()} ")]
+        assert synthesizer_cache_key(_make_state(sql_result="rows")) == (
+            synthesizer_cache_key(_make_state(messages=variant, sql_result="rows"))
+        )
+
+    def test_synthesizer_key_includes_iteration(self):
+        """A retry never replays the answer that triggered it."""
+        assert synthesizer_cache_key(_make_state(iteration=0)) != (
+            synthesizer_cache_key(_make_state(iteration=1))
+        )
+
+
+class TestLRUCache:
+    KEY_A = (("supervisor",), "0:a")
+    KEY_B = (("supervisor",), "0:b")
+    KEY_C = (("synthesizer",), "0:c")
+
+    def test_round_trip(self):
+        cache = LRUCache(maxsize=4)
+        cache.set({self.KEY_A: ({"route": "sql"}, None)})
+        assert cache.get([self.KEY_A, self.KEY_B]) == {self.KEY_A: {"route": "sql"}}
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set({self.KEY_A: (1, None), self.KEY_B: (2, None)})
+        cache.get([self.KEY_A])  # A is now more recent than B
+        cache.set({self.KEY_C: (3, None)})
+        assert cache.get([self.KEY_A, self.KEY_B, self.KEY_C]) == {
+            self.KEY_A: 1,
+            self.KEY_C: 3,
+        }
+
+    def test_expires_after_ttl(self):
+        cache = LRUCache(maxsize=4)
+        with patch("src.graph.cache.time.time", return_value=1000.0):
+            cache.set({self.KEY_A: (1, 60)})
+        with patch("src.graph.cache.time.time", return_value=1059.0):
+            assert cache.get([self.KEY_A]) == {self.KEY_A: 1}
+        with patch("src.graph.cache.time.time", return_value=1060.0):
+            assert cache.get([self.KEY_A]) == {}
+
+    def test_clear_by_namespace(self):
+        cache = LRUCache(maxsize=4)
+        cache.set({self.KEY_A: (1, None), self.KEY_C: (3, None)})
+        cache.clear([("supervisor",)])
+        assert cache.get([self.KEY_A, self.KEY_C]) == {self.KEY_C: 3}
+
+    def test_clear_graph_caches_empties_every_cache(self):
+        caches = [LRUCache(maxsize=4), LRUCache(maxsize=4)]
+        for cache in caches:
+            cache.set({self.KEY_A: (1, None)})
+        clear_graph_caches()
+        assert all(cache.get([self.KEY_A]) == {} for cache in caches)
@@ -3,15 +3,33 @@
 Strategy:
 - execute_sql validation (SELECT-only, forbidden keywords, auto LIMIT) is tested
   WITHOUT a database — the function returns error strings before ever touching the DB.
-- For the execution path, we mock get_connection() to control what the DB returns.
+- For the execution path, get_cursor() is patched to return a small stub cursor.
 - _avg_similarity and _format_results are pure functions — no mocking needed.
+- _get_stat_leaders caching is checked by counting mocked DB calls.
+- _SemanticCache is exercised with hand-built vectors — no embedding model.
 """
 
-import pandas as pd
+from decimal import Decimal
+
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
 
-from src.agent.tools import execute_sql, _avg_similarity, _format_results
+from src.agent.tools import (
+    execute_sql,
+    _format_table,
+    _avg_similarity,
+    _format_results,
+    _SemanticCache,
+    _get_stat_leaders,
+    _fetch_stat_leaders,
+    _best_variation,
+    _search_uncached,
+    search_players,
+    _match_stat_column,
+    clear_tool_caches,
+)
+from src.config import MIN_GAMES
 
 
 # ── execute_sql: validation guards ──────────────────────────────
@@ -22,159 +40,458 @@ from src.agent.tools import execute_sql, _avg_similarity, _format_results
 class TestSQLValidation:
     """Test that execute_sql rejects dangerous queries."""
 
-    def test_rejects_insert(self):
-        result = execute_sql("INSERT INTO player_season_features VALUES ('x')")
-        assert "Error" in result
-
-    def test_rejects_delete(self):
-        result = execute_sql("DELETE FROM player_season_features")
-        assert "Error" in result
-
-    def test_rejects_drop(self):
-        result = execute_sql("DROP TABLE player_season_features")
-        assert "Error" in result
-
-    def test_rejects_update(self):
-        result = execute_sql("UPDATE player_season_features SET pts_per_game = 0")
-        assert "Error" in result
-
-    def test_rejects_create(self):
-        result = execute_sql("CREATE TABLE hacked (id INT)")
-        assert "Error" in result
-
-    def test_rejects_truncate(self):
-        result = execute_sql("TRUNCATE TABLE player_season_features")
-        assert "Error" in result
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "INSERT INTO player_season_features VALUES ('x')",
+            "DELETE FROM player_season_features",
+            "DROP TABLE player_season_features",
+            "UPDATE player_season_features SET pts_per_game = 0",
+            "CREATE TABLE hacked (id INT)",
+            "TRUNCATE TABLE player_season_features",
+            # Mutation keyword inside a SELECT should still be blocked
+            "SELECT * FROM player_season_features; DROP TABLE x",
+        ],
+    )
+    def test_rejects_mutations(self, query):
+        assert "Error" in execute_sql(query)
 
     def test_rejects_plain_text(self):
         """A non-SQL string should be rejected (not a SELECT)."""
         result = execute_sql("hello world")
         assert result == "Error: only SELECT queries are allowed."
 
-    def test_rejects_mutation_hidden_in_select(self):
-        """Mutation keyword inside a SELECT should still be blocked."""
-        result = execute_sql("SELECT * FROM player_season_features; DROP TABLE x")
-        assert "Error" in result
+    def test_rejects_lowercase_mutation(self):
+        result = execute_sql("select 1; delete from player_season_features")
+        assert result == "Error: mutation statements are not allowed."
+
+    @patch("src.agent.tools.get_cursor")
+    def test_allows_keyword_inside_identifier(self, mock_get_cursor):
+        """Only whole words are forbidden — e.g. a column named last_update."""
+        mock_get_cursor.return_value.execute.return_value.fetchall.return_value = []
+        result = execute_sql("SELECT last_update, dropped FROM player_season_features")
+        assert result == "Query returned no results."
 
 
 # ── execute_sql: LIMIT enforcement ──────────────────────────────
-# We mock the DB to verify that LIMIT is auto-appended.
+# We stub the DB cursor to verify that LIMIT is auto-appended.
+
+
+_SQL_EXC = Exception("no such column: fake_col")
+
+
+class _StubCursor:
+    """Just enough of a DuckDB cursor for execute_sql."""
+
+    def __init__(self, rows=(), description=(), exc=None):
+        self.rows, self.description, self.exc = rows, description, exc
+        self.last_sql = None
+
+    def execute(self, sql):
+        self.last_sql = sql
+        if self.exc is not None:
+            raise self.exc
+        return self
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
 
 
 class TestSQLLimitEnforcement:
     """Test that execute_sql auto-appends LIMIT when missing."""
 
-    @patch("src.agent.tools.get_connection")
-    def test_auto_appends_limit(self, mock_get_conn):
+    # One-row result shared by the tests that need data back
+    _ROWS = (("Test Player",),)
+    _DESCRIPTION = (("player_name", "VARCHAR"),)
+
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def patched_get_cursor(cls):
+        """Patch get_cursor once for the whole class."""
+        patcher = patch("src.agent.tools.get_cursor")
+        cls.mock_get_cursor = patcher.start()
+        yield
+        patcher.stop()
+        del cls.mock_get_cursor
+
+    @pytest.fixture(autouse=True)
+    def reset_get_cursor(self):
+        """Clear call history and the stub cursor after each test."""
+        yield
+        self.mock_get_cursor.reset_mock(return_value=True)
+
+    def _cursor(self, **kwargs) -> _StubCursor:
+        """Make get_cursor hand out a fresh stub for this test."""
+        self.mock_get_cursor.return_value = cursor = _StubCursor(**kwargs)
+        return cursor
+
+    def test_auto_appends_limit(self):
         """Query without LIMIT should get LIMIT 50 appended."""
-        mock_conn = MagicMock()
-        mock_conn.execute.return_value.fetchdf.return_value = pd.DataFrame(
-            {"player_name": ["Test Player"]}
-        )
-        mock_get_conn.return_value = mock_conn
+        cursor = self._cursor(rows=self._ROWS, description=self._DESCRIPTION)
 
         execute_sql("SELECT player_name FROM player_season_features")
 
-        executed_sql = mock_conn.execute.call_args[0][0]
-        assert "LIMIT 50" in executed_sql
+        assert "LIMIT 50" in cursor.last_sql
 
-    @patch("src.agent.tools.get_connection")
-    def test_preserves_existing_limit(self, mock_get_conn):
+    def test_preserves_existing_limit(self):
         """Query that already has LIMIT should NOT get a second one."""
-        mock_conn = MagicMock()
-        mock_conn.execute.return_value.fetchdf.return_value = pd.DataFrame(
-            {"player_name": ["Test Player"]}
-        )
-        mock_get_conn.return_value = mock_conn
+        cursor = self._cursor(rows=self._ROWS, description=self._DESCRIPTION)
 
         execute_sql("SELECT player_name FROM player_season_features LIMIT 5")
 
-        executed_sql = mock_conn.execute.call_args[0][0]
-        assert executed_sql.count("LIMIT") == 1
+        assert cursor.last_sql.count("LIMIT") == 1
 
-    @patch("src.agent.tools.get_connection")
-    def test_empty_result_message(self, mock_get_conn):
-        """Empty DataFrame should return a clear message, not crash."""
-        mock_conn = MagicMock()
-        mock_conn.execute.return_value.fetchdf.return_value = pd.DataFrame()
-        mock_get_conn.return_value = mock_conn
+    def test_preserves_lowercase_limit(self):
+        cursor = self._cursor()
+
+        execute_sql("select player_name from player_season_features limit 5")
+
+        assert "LIMIT 50" not in cursor.last_sql
+
+    def test_empty_result_message(self):
+        """An empty result set should return a clear message, not crash."""
+        self._cursor()
 
         result = execute_sql(
             "SELECT * FROM player_season_features WHERE player_name = 'Nobody'"
         )
         assert result == "Query returned no results."
 
-    @patch("src.agent.tools.get_connection")
-    def test_sql_error_is_caught(self, mock_get_conn):
+    def test_sql_error_is_caught(self):
         """DB exceptions should be returned as error strings, not raised."""
-        mock_conn = MagicMock()
-        mock_conn.execute.side_effect = Exception("no such column: fake_col")
-        mock_get_conn.return_value = mock_conn
+        self._cursor(exc=_SQL_EXC)
 
         result = execute_sql("SELECT fake_col FROM player_season_features")
         assert result.startswith("SQL error:")
         assert "fake_col" in result
 
 
-# ── _avg_similarity ─────────────────────────────────────────────
+# ── _match_stat_column ──────────────────────────────────────────
+# Pure function — keyword scan over the query string.
+
+
+class TestMatchStatColumn:
+    def test_matches_keyword(self):
+        assert _match_stat_column("Who were the best rebounders?") == "reb_per_game"
+
+    def test_case_insensitive(self):
+        assert _match_stat_column("TOP SCORERS") == "pts_per_game"
+
+    def test_no_keyword_returns_none(self):
+        assert _match_stat_column("describe LeBron's play style") is None
+
+    def test_priority_order_beats_position(self):
+        """'defend' outranks 'scor' even though 'scoring' comes first."""
+        assert _match_stat_column("best scoring defenders") == "stocks_per_game"
+
+    def test_overlapping_keywords(self):
+        """'three-point' contains both 'three-p' and 'point'; 'three-p' wins."""
+        assert _match_stat_column("three-point shooters") == "three_pt_made_per_game"
+
+
+# ── _format_table ───────────────────────────────────────────────
 # Pure function — no mocking needed.
 
 
-class TestAvgSimilarity:
-    def test_empty_list(self):
-        assert _avg_similarity([]) == 0.0
+class TestFormatTable:
+    def test_header_and_rows_right_aligned(self):
+        table = _format_table(
+            ["player_name", "pts"], [("LeBron James", 25.3), ("Al", 8.0)]
+        )
+        assert table.splitlines() == [
+            " player_name  pts",
+            "LeBron James 25.3",
+            "          Al  8.0",
+        ]
+
+    def test_float_precision_is_capped(self):
+        assert _format_table(["ts"], [(0.123456789,)]).splitlines()[1] == "0.123457"
+
+    def test_trailing_zeros_trimmed_per_column(self):
+        """Like pandas: one decimal count for the whole column."""
+        table = _format_table(["ts"], [(0.6,), (0.61234,)])
+        assert table.splitlines()[1:] == ["0.60000", "0.61234"]
+
+    def test_tiny_values_switch_column_to_scientific(self):
+        table = _format_table(["x"], [(1e-7,), (1.0,)])
+        assert table.splitlines()[1:] == ["1.000000e-07", "1.000000e+00"]
+
+    def test_numeric_header_gets_leading_space(self):
+        assert _format_table(["gp", "name"], [(82, "Al")]).splitlines() == [
+            " gp name",
+            " 82   Al",
+        ]
+
+    def test_decimal_formats_as_float(self):
+        """DECIMAL arrives as Decimal('31.20'); pandas sees float64 31.2."""
+        table = _format_table(["pts"], [(Decimal("31.20"),)], ["DECIMAL(5,2)"])
+        assert table.splitlines() == [" pts", "31.2"]
+
+    def test_hugeint_formats_as_float(self):
+        """SUM over INTEGER is HUGEINT, which pandas converts to float64."""
+        table = _format_table(["total"], [(28647,)], ["HUGEINT"])
+        assert table.splitlines() == ["  total", "28647.0"]
+
+    def test_float_null_is_nan(self):
+        table = _format_table(["ratio"], [(0.5,), (None,)], ["DOUBLE"])
+        assert table.splitlines()[1:] == ["   0.5", "   NaN"]
+
+    def test_integer_null_is_na(self):
+        table = _format_table(["gp"], [(82,), (None,)], ["BIGINT"])
+        assert table.splitlines()[1:] == ["  82", "<NA>"]
+
+    def test_text_null_is_nan(self):
+        table = _format_table(["name"], [("Al",), (None,)], ["VARCHAR"])
+        assert table.splitlines()[1:] == ["  Al", " NaN"]
+
+
+# ── _get_stat_leaders: result caching ───────────────────────────
+# The DB is mocked; we only count how often it is queried.
+
 
-    def test_single_result(self):
-        assert _avg_similarity([{"similarity": 0.8}]) == 0.8
+class TestStatLeadersCache:
+    def setup_method(self):
+        clear_tool_caches()
 
-    def test_multiple_results(self):
-        results = [{"similarity": 0.6}, {"similarity": 0.4}]
-        assert _avg_similarity(results) == pytest.approx(0.5)
+    def teardown_method(self):
+        clear_tool_caches()
+
+    @patch("src.agent.tools.get_cursor")
+    def test_repeat_lookup_hits_cache(self, mock_get_cursor):
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.fetchall.return_value = []
+        mock_get_cursor.return_value = mock_conn
+
+        _get_stat_leaders("best defenders")
+        _get_stat_leaders("top defenders")  # same column, same top_k
+
+        assert mock_conn.execute.call_count == 1
+
+    @patch("src.agent.tools.get_cursor")
+    def test_clear_tool_caches_forces_requery(self, mock_get_cursor):
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.fetchall.return_value = []
+        mock_get_cursor.return_value = mock_conn
+
+        _get_stat_leaders("best defenders")
+        clear_tool_caches()
+        _get_stat_leaders("best defenders")
+
+        assert mock_conn.execute.call_count == 2
+
+    @patch("src.agent.tools.get_cursor")
+    def test_no_keyword_skips_db(self, mock_get_cursor):
+        assert _get_stat_leaders("describe his play style") == []
+        mock_get_cursor.assert_not_called()
+
+    @patch("src.agent.tools.get_cursor")
+    def test_binds_min_games_and_limit(self, mock_get_cursor):
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.fetchall.return_value = []
+        mock_get_cursor.return_value = mock_conn
+
+        _get_stat_leaders("best rebounders", top_k=3)
+
+        executed_sql, params = mock_conn.execute.call_args[0]
+        assert "ORDER BY f.reb_per_game DESC" in executed_sql
+        assert params == [MIN_GAMES, 3]
+
+    @patch("src.agent.tools.get_cursor")
+    def test_cached_rows_are_read_only(self, mock_get_cursor):
+        mock_get_cursor.return_value.execute.return_value.fetchall.return_value = [
+            ("A", "a", *range(9))
+        ]
+        (row,) = _get_stat_leaders("best defenders", top_k=1)
+        with pytest.raises(TypeError):
+            row["similarity"] = 0.0
+        with pytest.raises(TypeError):
+            row["stats"]["pts_per_game"] = 99
+
+    def test_rejects_unknown_column(self):
+        with pytest.raises(ValueError):
+            _fetch_stat_leaders("pts_per_game; DROP TABLE x", 5)
+
+
+# ── search_players / _search_uncached: hybrid path ──────────────
+# Stat leaders and the retriever are mocked; we check when the embedding
+# model and the semantic fill run, and that the fill doesn't duplicate players.
+
+
+def _player(name: str) -> dict:
+    return {"player_name": name, "summary": name, "similarity": 0.5}
+
+
+class TestHybridSearch:
+    @patch("src.agent.tools.get_retriever")
+    @patch("src.agent.tools._get_stat_leaders")
+    def test_full_leaders_skip_retriever(self, mock_leaders, mock_get_retriever):
+        mock_leaders.return_value = [_player("A"), _player("B")]
+        formatted = search_players("best defenders", top_k=2)
+        assert "1. A" in formatted and "2. B" in formatted
+        mock_get_retriever.assert_not_called()
+
+    @patch("src.agent.tools.get_retriever")
+    def test_partial_leaders_filled_without_duplicates(self, mock_get_retriever):
+        mock_get_retriever.return_value.retrieve_with_stats.return_value = [
+            _player("A"),
+            _player("C"),
+        ]
+        formatted = _search_uncached("best defenders", 2, np.zeros(4), [_player("A")])
+        assert "2. C" in formatted
+        assert formatted.count("A (similarity") == 1
+
+
+# ── _best_variation: low-confidence rephrasings ───────────────────
+# The retriever is mocked; we check which variation wins and call counts.
+
+
+class TestBestVariation:
+    @staticmethod
+    def _mock_retriever():
+        retriever = MagicMock()
+        retriever.embed_batch.return_value = np.zeros((2, 4))
+        retriever.retrieve_with_stats.side_effect = lambda text, *_: [
+            {
+                "player_name": text,
+                "similarity": 0.3 if "NBA player who" in text else 0.2,
+            }
+        ]
+        return retriever
+
+    @patch("src.agent.tools.get_retriever")
+    def test_keeps_higher_scoring_variation(self, mock_get_retriever):
+        mock_get_retriever.return_value = self._mock_retriever()
+        results, avg = _best_variation("glue guy", 5)
+        assert results[0]["player_name"] == "NBA player who glue guy"
+        assert avg == 0.3
+
+    @patch("src.agent.tools.get_retriever")
+    def test_embeds_both_variations_in_one_batch(self, mock_get_retriever):
+        retriever = self._mock_retriever()
+        mock_get_retriever.return_value = retriever
+        _best_variation("glue guy", 5)
+        retriever.embed_batch.assert_called_once()
+        retriever.embed.assert_not_called()
+
+
+# ── _avg_similarity ─────────────────────────────────────────────
+# Pure function — no mocking needed.
+
+
+class TestAvgSimilarity:
+    @pytest.mark.parametrize(
+        "results,expected",
+        [
+            ([], 0.0),
+            ([{"similarity": 0.8}], 0.8),
+            ([{"similarity": 0.6}, {"similarity": 0.4}], 0.5),
+        ],
+        ids=["empty", "single", "multiple"],
+    )
+    def test_average(self, results, expected):
+        assert _avg_similarity(results) == pytest.approx(expected)
 
 
 # ── _format_results ─────────────────────────────────────────────
 # Pure function — no mocking needed.
 
+_LEBRON_RESULT = [
+    {
+        "player_name": "LeBron James",
+        "similarity": 0.95,
+        "summary": "Great player",
+        "stats": {
+            "pts_per_game": 25.3,
+            "reb_per_game": 7.4,
+            "ast_per_game": 8.7,
+            "stl_per_game": 1.2,
+            "blk_per_game": 0.6,
+        },
+    }
+]
+_BENCH_RESULT = [
+    {"player_name": "Bench Player", "similarity": 0.10, "summary": "Rarely plays"}
+]
+_AB_RESULT = [
+    {"player_name": "A", "similarity": 0.9, "summary": "a"},
+    {"player_name": "B", "similarity": 0.8, "summary": "b"},
+]
+
 
 class TestFormatResults:
     def test_includes_player_name(self):
-        results = [
-            {
-                "player_name": "LeBron James",
-                "similarity": 0.95,
-                "summary": "Great player",
-                "stats": {
-                    "pts_per_game": 25.3,
-                    "reb_per_game": 7.4,
-                    "ast_per_game": 8.7,
-                    "stl_per_game": 1.2,
-                    "blk_per_game": 0.6,
-                },
-            }
-        ]
-        formatted = _format_results(results)
+        formatted = _format_results(_LEBRON_RESULT)
         assert "LeBron James" in formatted
         assert "25.3 PPG" in formatted
         assert "0.95" in formatted
 
     def test_missing_stats_default_to_zero(self):
         """Results without a stats dict should show 0.0 for all stats."""
-        results = [
-            {
-                "player_name": "Bench Player",
-                "similarity": 0.10,
-                "summary": "Rarely plays",
-            }
-        ]
-        formatted = _format_results(results)
+        formatted = _format_results(_BENCH_RESULT)
         assert "0.0 PPG" in formatted
 
     def test_numbering(self):
         """Multiple results should be numbered 1., 2., etc."""
-        results = [
-            {"player_name": "A", "similarity": 0.9, "summary": "a"},
-            {"player_name": "B", "similarity": 0.8, "summary": "b"},
-        ]
-        formatted = _format_results(results)
+        formatted = _format_results(_AB_RESULT)
         assert formatted.startswith("1. A")
         assert "2. B" in formatted
+
+
+# ── _SemanticCache ──────────────────────────────────────────────
+# Pure in-memory structure — hand-built vectors stand in for embeddings.
+
+
+class TestSemanticCache:
+    def test_exact_hit(self):
+        cache = _SemanticCache(min_similarity=0.97, max_size=4, ttl=60)
+        cache.put("ns", np.array([1.0, 0.0]), "cached")
+        assert cache.get("ns", np.array([1.0, 0.0])) == "cached"
+
+    def test_near_hit_ignores_magnitude(self):
+        """Matching is by direction only — scaled vectors still hit."""
+        cache = _SemanticCache(min_similarity=0.97, max_size=4, ttl=60)
+        cache.put("ns", np.array([1.0, 0.0]), "cached")
+        assert cache.get("ns", np.array([5.0, 0.1])) == "cached"
+
+    def test_distant_query_misses(self):
+        cache = _SemanticCache(min_similarity=0.97, max_size=4, ttl=60)
+        cache.put("ns", np.array([1.0, 0.0]), "cached")
+        assert cache.get("ns", np.array([0.0, 1.0])) is None
+
+    def test_nan_query_misses(self):
+        """NaN compares false with everything, so it must not pass the threshold."""
+        cache = _SemanticCache(min_similarity=0.97, max_size=4, ttl=60)
+        cache.put("ns", np.array([1.0, 0.0]), "cached")
+        assert cache.get("ns", np.array([np.nan, 1.0])) is None
+
+    def test_namespaces_are_isolated(self):
+        cache = _SemanticCache(min_similarity=0.97, max_size=4, ttl=60)
+        cache.put(("pts_per_game", 5), np.array([1.0, 0.0]), "scorers")
+        assert cache.get(("reb_per_game", 5), np.array([1.0, 0.0])) is None
+
+    def test_evicts_least_recently_used(self):
+        cache = _SemanticCache(min_similarity=0.97, max_size=2, ttl=60)
+        cache.put("ns", np.array([1.0, 0.0]), "a")
+        cache.put("ns", np.array([0.0, 1.0]), "b")
+        cache.get("ns", np.array([1.0, 0.0]))  # touch "a" so "b" is oldest
+        cache.put("ns", np.array([-1.0, 0.0]), "c")
+        assert cache.get("ns", np.array([1.0, 0.0])) == "a"
+        assert cache.get("ns", np.array([0.0, 1.0])) is None
+
+    def test_picks_most_similar_entry(self):
+        cache = _SemanticCache(min_similarity=0.9, max_size=4, ttl=60)
+        cache.put("ns", np.array([1.0, 0.3]), "near")
+        cache.put("ns", np.array([1.0, 0.0]), "exact")
+        assert cache.get("ns", np.array([1.0, 0.0])) == "exact"
+
+    def test_expires_after_ttl(self):
+        cache = _SemanticCache(min_similarity=0.97, max_size=4, ttl=60)
+        with patch("src.agent.tools.time.monotonic", return_value=100.0):
+            cache.put("ns", np.array([1.0, 0.0]), "cached")
+        with patch("src.agent.tools.time.monotonic", return_value=159.0):
+            assert cache.get("ns", np.array([1.0, 0.0])) == "cached"
+        with patch("src.agent.tools.time.monotonic", return_value=160.0):
+            assert cache.get("ns", np.array([1.0, 0.0])) is None